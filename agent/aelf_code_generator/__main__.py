@@ -10,9 +10,11 @@ from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field, ValidationError
 from copilotkit import CopilotKitSDK, LangGraphAgent
 from copilotkit.integrations.fastapi import add_fastapi_endpoint
 from aelf_code_generator.agent import create_agent, graph
+from aelf_code_generator.model import close_http_async_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +29,7 @@ async def lifespan(app: FastAPI):
     yield
     # Cleanup on shutdown
     logger.info("Shutting down the application...")
+    await close_http_async_client()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -50,25 +53,53 @@ sdk = CopilotKitSDK(
     ],
 )
 
+class CopilotKitRequest(BaseModel):
+    """Request body accepted by the copilotkit endpoints."""
+    messages: List[Dict[str, Any]] = Field(default_factory=list)
+
+def get_message_text(message: Dict[str, Any]) -> str:
+    """
+    Get the stripped text of a chat message.
+    
+    Content is either a plain string or a list of content parts, of which
+    only the text parts are used.
+    """
+    content = message.get("content")
+    if isinstance(content, str):
+        return content.strip()
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        ).strip()
+    return ""
+
 # Custom message handler
-async def handle_messages(messages: List[Dict[str, str]]) -> JSONResponse:
+async def handle_messages(messages: List[Dict[str, Any]]) -> JSONResponse:
     """Handle incoming messages and return a JSON response."""
     try:
         # Log incoming messages
         logger.info(f"Received messages: {messages}")
         
-        # Create initial state
-        state = {
-            "input": messages[-1]["content"] if messages else "",
-            "messages": messages
-        }
+        # Reject requests without text before running any model calls
+        input_text = get_message_text(messages[-1]) if messages else ""
+        if not input_text:
+            return JSONResponse(
+                status_code=422,
+                content={"error": "The last message must contain text content"}
+            )
+        
+        # Create initial state; AgentState has no messages channel, so only
+        # the latest message content is passed to the graph
+        state = {"input": input_text}
         
-        # Accumulate all events
-        events = []
+        # Only the last event is used for the response
+        last_event = None
         try:
             async for event in graph.astream(state):
                 logger.info(f"Generated event: {event}")
-                events.append(event)
+                last_event = event
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             return JSONResponse(
@@ -77,8 +108,7 @@ async def handle_messages(messages: List[Dict[str, str]]) -> JSONResponse:
             )
         
         # Return the last event as the final response
-        if events:
-            last_event = events[-1]
+        if last_event:
             # Extract the internal output from the last event
             if "_internal" in last_event.get("analyze", {}):
                 internal_output = last_event["analyze"]["_internal"]["output"]
@@ -113,9 +143,15 @@ async def handle_messages(messages: List[Dict[str, str]]) -> JSONResponse:
 async def copilotkit_endpoint(request: Request):
     """Handle requests to the copilotkit endpoint."""
     try:
-        body = await request.json()
-        messages = body.get("messages", [])
-        return await handle_messages(messages)
+        # Validate straight from the raw body bytes with pydantic-core
+        body = CopilotKitRequest.model_validate_json(await request.body())
+        return await handle_messages(body.messages)
+    except ValidationError as e:
+        logger.error(f"Invalid copilotkit request: {str(e)}")
+        return JSONResponse(
+            status_code=422,
+            content={"error": f"Invalid request: {str(e)}"}
+        )
     except Exception as e:
         logger.error(f"Error in copilotkit_endpoint: {str(e)}")
         return JSONResponse(
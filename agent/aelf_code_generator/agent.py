@@ -11,9 +11,16 @@ import hashlib
 import logging
 import time
 import random
+import functools
+import tempfile
+import zipfile
+import subprocess
+from collections import OrderedDict
 from typing import Dict, List, Any, Annotated, Literal, Optional, Tuple, Set
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage, SystemMessage
 from langchain_core.documents import Document
+from langchain_core.exceptions import OutputParserException
+from langchain_core.globals import get_llm_cache
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt.tool_executor import ToolExecutor
 from langgraph.graph.message import add_messages
@@ -24,19 +31,15 @@ from langchain_core.vectorstores import VectorStore
 from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings, AzureOpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from aelf_code_generator.model import get_model
-from aelf_code_generator.types import AgentState, ContractOutput, CodebaseInsight, get_default_state
+from aelf_code_generator.model import get_model, create_system_message, ainvoke_model, llm_request_slot, loop_local
+from aelf_code_generator.types import AgentState, ContractOutput, ContractFixOutput, CodebaseInsight, CONTRACT_COMPONENTS, get_default_state, get_default_internal_state
 from datetime import datetime
 from pathlib import Path
 import sys
 import asyncio
 from aelf_code_generator.prompts import (
-    SYSTEM_PROMPT,
-    CODE_GENERATION_PROMPT,
+    render_code_generation_prompt,
     CODEBASE_ANALYSIS_PROMPT,
-    UI_GENERATION_PROMPT,
-    TESTING_PROMPT,
-    DOCUMENTATION_PROMPT,
     ANALYSIS_PROMPT,
     VALIDATION_PROMPT,
     PROTO_GENERATION_PROMPT
@@ -57,9 +60,14 @@ RAG_CONFIG = {
     "chunk_size": 1000,                           # Size of code chunks for embedding
     "chunk_overlap": 200,                         # Overlap between chunks
     "retrieval_k": 5,                             # Number of samples to retrieve
-    "file_extensions": [".cs", ".proto", ".csproj"] # File extensions to index
+    "file_extensions": [".cs", ".proto", ".csproj"], # File extensions to index
+    "insights_cache_ttl": 3600,                   # Seconds to reuse codebase insights for the same analysis
+    "insights_cache_size": 128                    # Maximum number of cached codebase insights
 }
 
+# Maximum number of referenced proto files generated concurrently
+PROTO_GENERATION_CONCURRENCY = 8
+
 # Configure logging
 def setup_logging():
     """Configure and initialize logging for the RAG system."""
@@ -120,15 +128,138 @@ InternalStateType = Annotated[Dict, "internal"]
 _RAG_INDEX_INITIALIZED = False
 _RAG_VECTOR_STORE = None
 _RAG_FILE_CACHE = {}
+# One lock per running loop, since an asyncio.Lock binds to the loop that first waits on it
+_RAG_INDEX_LOCKS: Dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
 
-def get_embeddings() -> Embeddings:
-    """Get the embeddings model for RAG."""
-    import os
+# Directory names skipped when indexing, as a set for per-path-component lookups
+_EXCLUDED_DIRS = frozenset(RAG_CONFIG["excluded_dirs"])
+
+# Static instructions that precede the generated code in validation requests
+_VALIDATION_INSTRUCTIONS = """
+Please validate the smart contract code generated for AELF below and provide a detailed analysis with specific issues and fixes.
+
+Categorize your findings into:
+1. Critical issues (must be fixed)
+2. Improvements (recommended but not critical)
+3. Best practices
+
+For each issue found, provide specific suggestions on how to fix it. If no issues are found in a category, explicitly state "No issues found in this category."
+
+"""
+
+# Keywords in the requirements analysis mapped to the contract type used for retrieval
+CONTRACT_TYPE_KEYWORDS = {
+    "lottery": "lottery game",
+    "voting": "voting contract",
+    "dao": "dao contract",
+    "token": "token contract",
+    "nft": "nft contract",
+    "staking": "staking contract",
+    "game": "game contract",
+    "expense": "expense tracker",
+    "auction": "auction contract",
+    "allowance": "allowance contract"
+}
+
+# Analysis keywords that select targeted retrieval queries, found in one pass;
+# the lookahead also reports keywords that overlap, as plain substring checks would
+_QUERY_KEYWORD_RE = re.compile(r"(?=(state|variable|method|function|event|access|owner|permission))")
+
+# Descriptions of generated file types used when building fix prompts
+_FILE_TYPE_DESCRIPTIONS = {
+    ".cs": "C# source code file",
+    ".csproj": "C# project file",
+    ".proto": "Protocol Buffer definition file"
+}
+
+# Keyword patterns used to parse validation feedback in a single pass per line
+_ISSUE_LINE_RE = re.compile(r"issue|error|problem|missing", re.IGNORECASE)
+_SUGGESTION_LINE_RE = re.compile(r"fix|suggestion|should|add|change", re.IGNORECASE)
+_CRITICAL_KEYWORD_RE = re.compile(r"error|missing|invalid|incorrect|problem|issue", re.IGNORECASE)
+# Lines that report a clean category or only head one, neither of which is an issue
+_NO_ISSUES_RE = re.compile(r"no issues found", re.IGNORECASE)
+_CATEGORY_HEADING_RE = re.compile(
+    r"^[\s#*\d.]*(?:critical issues|improvements|best practices)\s*(?:\(.*\))?[\s:*]*$",
+    re.IGNORECASE
+)
+
+# Markdown code fences the model may wrap generated proto files in
+_PROTO_FENCE_RE = re.compile(r"```(?:protobuf|proto)?")
+
+# Insights used when codebase analysis fails
+_FALLBACK_CODEBASE_INSIGHTS = {
+    "project_structure": """Standard AELF project structure:
+1. Contract class inheriting from AElfContract
+2. State class for data storage
+3. Proto files for interface definition
+4. Project configuration in .csproj""",
+    "coding_patterns": """Common AELF patterns:
+1. State management using MapState/SingletonState
+2. Event emission for status changes
+3. Authorization checks using Context.Sender
+4. Input validation with proper error handling""",
+    "implementation_guidelines": """Follow AELF best practices:
+1. Use proper base classes and inheritance
+2. Implement robust state management
+3. Add proper access control checks
+4. Include comprehensive input validation
+5. Emit events for important state changes
+6. Follow proper error handling patterns
+7. Add XML documentation for all public members"""
+}
+
+# Insights used when code generation starts without any codebase analysis
+_DEFAULT_CODEBASE_INSIGHTS = {
+    "project_structure": "Standard AELF project structure",
+    "coding_patterns": "Common AELF patterns",
+    "implementation_guidelines": "Follow AELF best practices",
+    "sample_references": ""
+}
+
+# Codebase insights keyed by a hash of the requirements analysis, so repeated
+# requests with the same analysis skip retrieval and the insights LLM call
+_CODEBASE_INSIGHTS_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def get_codebase_cache_key(analysis: str) -> str:
+    """Build the codebase insights cache key for a requirements analysis."""
+    return hashlib.blake2b(analysis.encode("utf-8"), digest_size=16).hexdigest()
+
+def get_cached_codebase_insights(key: str) -> Optional[Dict[str, Any]]:
+    """Return cached codebase analysis results for a key if they have not expired."""
+    entry = _CODEBASE_INSIGHTS_CACHE.get(key)
+    if entry is None:
+        return None
     
-    logger.info(f"Using embedding model: {RAG_CONFIG['embedding_model']}")
+    stored_at, result = entry
+    if time.time() - stored_at > RAG_CONFIG["insights_cache_ttl"]:
+        del _CODEBASE_INSIGHTS_CACHE[key]
+        return None
     
+    _CODEBASE_INSIGHTS_CACHE.move_to_end(key)
+    return result
+
+def cache_codebase_insights(key: str, result: Dict[str, Any]) -> None:
+    """Store codebase analysis results, evicting the least recently used entry when full."""
+    _CODEBASE_INSIGHTS_CACHE[key] = (time.time(), result)
+    _CODEBASE_INSIGHTS_CACHE.move_to_end(key)
+    while len(_CODEBASE_INSIGHTS_CACHE) > RAG_CONFIG["insights_cache_size"]:
+        _CODEBASE_INSIGHTS_CACHE.popitem(last=False)
+
+def get_embeddings() -> Embeddings:
+    """Get the embeddings model for RAG."""
     # Check embedding model preference (separate from main model)
     embedding_model_type = os.getenv("EMBEDDING_MODEL", os.getenv("MODEL", "")).lower()
+    return _build_embeddings(embedding_model_type)
+
+@functools.lru_cache(maxsize=4)
+def _build_embeddings(embedding_model_type: str) -> Embeddings:
+    """
+    Construct and verify the embeddings model for an embedding model type.
+    
+    The verified model is cached so the deployment probing and test query
+    only run once per process instead of on every RAG retrieval.
+    """
+    logger.info(f"Using embedding model: {RAG_CONFIG['embedding_model']}")
     
     # Use Google Gemini if configured
     if embedding_model_type == "gemini" or embedding_model_type == "google_genai":
@@ -209,6 +340,25 @@ async def initialize_rag_index(force_rebuild: bool = False) -> VectorStore:
     """
     Initialize the RAG index for AELF samples
     """
+    global _RAG_INDEX_INITIALIZED, _RAG_VECTOR_STORE
+    
+    # Reuse the index loaded by an earlier retrieval
+    if _RAG_INDEX_INITIALIZED and not force_rebuild:
+        return _RAG_VECTOR_STORE
+    
+    # Concurrent retrievals wait for a single load instead of each reading the index
+    async with loop_local(_RAG_INDEX_LOCKS, asyncio.Lock):
+        if _RAG_INDEX_INITIALIZED and not force_rebuild:
+            return _RAG_VECTOR_STORE
+        
+        _RAG_VECTOR_STORE = await _load_or_build_rag_index(force_rebuild)
+        _RAG_INDEX_INITIALIZED = True
+        return _RAG_VECTOR_STORE
+
+async def _load_or_build_rag_index(force_rebuild: bool) -> VectorStore:
+    """
+    Load the RAG index from disk, or build it from the AELF samples
+    """
     logger.info("Initializing RAG index")
     start_time = time.time()
     
@@ -256,31 +406,20 @@ async def initialize_rag_index(force_rebuild: bool = False) -> VectorStore:
             logger.error(f"Samples directory not found: {samples_dir}")
             raise FileNotFoundError(f"Samples directory not found: {samples_dir}")
             
-        # Count total files to index
+        # Scan for files to index, globbing each extension once
         logger.info("Scanning aelf-samples directory for files to index")
-        total_files = 0
+        found_files = []
         for ext in RAG_CONFIG["file_extensions"]:
             pattern = str(samples_dir / "**" / f"*{ext}")
-            found_files = glob.glob(pattern, recursive=True)
-            total_files += len(found_files)
+            found_files.extend(glob.glob(pattern, recursive=True))
         
-        logger.info(f"Found {total_files} total files with extensions {RAG_CONFIG['file_extensions']}")
+        logger.info(f"Found {len(found_files)} total files with extensions {RAG_CONFIG['file_extensions']}")
         
-        # Create a list of all files to index
-        files_to_index = []
-        for ext in RAG_CONFIG["file_extensions"]:
-            pattern = str(samples_dir / "**" / f"*{ext}")
-            found_files = glob.glob(pattern, recursive=True)
-            
-            for file in found_files:
-                skip = False
-                for excluded in RAG_CONFIG["excluded_dirs"]:
-                    if f"/{excluded}/" in file or file.endswith(f"/{excluded}"):
-                        skip = True
-                        break
-                
-                if not skip:
-                    files_to_index.append(file)
+        # Create a list of all files to index, skipping files inside excluded directories
+        files_to_index = [
+            file for file in found_files
+            if _EXCLUDED_DIRS.isdisjoint(Path(file).relative_to(samples_dir).parts[:-1])
+        ]
         
         logger.info(f"Indexing {len(files_to_index)} files after excluding directories {RAG_CONFIG['excluded_dirs']}")
         
@@ -362,64 +501,74 @@ async def initialize_rag_index(force_rebuild: bool = False) -> VectorStore:
         logger.error(traceback.format_exc())
         raise
 
-async def retrieve_relevant_samples(query: str, 
-                                   contract_type: Optional[str] = None, 
-                                   k: int = RAG_CONFIG["retrieval_k"]) -> List[Dict]:
+async def retrieve_samples_for_queries(queries: List[str],
+                                      contract_type: Optional[str] = None,
+                                      k: int = RAG_CONFIG["retrieval_k"]) -> List[List[Dict]]:
     """
-    Retrieve relevant code samples from the vector store
+    Retrieve relevant code samples for several queries at once
+    
+    All queries are embedded in a single batched embeddings request, then
+    searched against the vector store by vector.
+    
+    Returns:
+        One list of samples per query, in query order
     """
-    if k is None:
-        k = RAG_CONFIG["retrieval_k"]
-        
     try:
-        logger.info(f"Retrieving samples for query: '{query}' (contract_type={contract_type}, k={k})")
+        logger.info(f"Retrieving samples for {len(queries)} queries (contract_type={contract_type}, k={k})")
         start_time = time.time()
         
         # Initialize vector store
         vectorstore = await initialize_rag_index()
         
-        # Create a composite query by combining the query with contract type
-        search_query = query
-        if contract_type:
-            search_query = f"{contract_type}: {query}"
-            
-        logger.info(f"Using search query: '{search_query}'")
-        
-        # Search for relevant documents
-        docs = vectorstore.similarity_search(search_query, k=k)
-        
-        # Format results as samples
-        samples = []
-        for doc in docs:
-            metadata = doc.metadata
-            samples.append({
-                "content": doc.page_content,
-                "source": metadata.get("source", "unknown"),
-                "project": metadata.get("project", "unknown"),
-                "file_type": metadata.get("file_type", "unknown")
-            })
-            
-        retrieval_time = time.time() - start_time
-        logger.info(f"Retrieved {len(samples)} samples in {retrieval_time:.2f} seconds")
+        # Create composite queries by combining each query with contract type
+        search_queries = [f"{contract_type}: {query}" if contract_type else query for query in queries]
         
-        # Log some details about the retrieved samples
-        if samples:
-            sample_info = "\n".join([f"- {s['source']} ({s['project']})" for s in samples[:3]])
-            logger.info(f"Top sample sources:\n{sample_info}")
+        # Embed all queries with one request off the event loop
+        vectors = await asyncio.to_thread(embed_search_queries, get_embeddings(), search_queries)
         
-        return samples
+        # Search by vector off the event loop as well
+        results = await asyncio.to_thread(search_samples_by_vectors, vectorstore, vectors, k)
+        
+        retrieval_time = time.time() - start_time
+        logger.info(f"Retrieved {sum(len(samples) for samples in results)} samples in {retrieval_time:.2f} seconds")
+        
+        return results
         
     except Exception as e:
         logger.error(f"Error retrieving samples: {str(e)}")
         logger.error(traceback.format_exc())
-        return []
+        return [[] for _ in queries]
+
+def embed_search_queries(embed_model: Embeddings, queries: List[str]) -> List[List[float]]:
+    """Embed search queries in a single batched request."""
+    if hasattr(embed_model, "task_type"):
+        # Gemini embeds documents and queries differently, so keep query semantics
+        return embed_model.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+    return embed_model.embed_documents(queries)
+
+def search_samples_by_vectors(vectorstore: FAISS, vectors: List[List[float]], k: int) -> List[List[Dict]]:
+    """Search the vector store for each query vector, returning one sample list per vector."""
+    return [docs_to_samples(vectorstore.similarity_search_by_vector(vector, k=k)) for vector in vectors]
+
+def docs_to_samples(docs: List[Document]) -> List[Dict]:
+    """Convert retrieved documents to sample dictionaries."""
+    samples = []
+    for doc in docs:
+        metadata = doc.metadata
+        samples.append({
+            "content": doc.page_content,
+            "source": metadata.get("source", "unknown"),
+            "project": metadata.get("project", "unknown"),
+            "file_type": metadata.get("file_type", "unknown")
+        })
+    return samples
 
 def format_code_samples_for_prompt(samples: List[Dict]) -> str:
     """
     Format code samples for inclusion in a prompt.
     
     Args:
-        samples: List of sample dictionaries returned by retrieve_relevant_samples
+        samples: List of sample dictionaries returned by retrieve_samples_for_queries
         
     Returns:
         Formatted string with code samples for prompt inclusion
@@ -467,22 +616,92 @@ def format_code_samples_for_prompt(samples: List[Dict]) -> str:
     
     return result
 
+def get_internal_state(state: AgentState) -> Dict[str, Any]:
+    """
+    Get the internal workflow state, creating the default one only when it is missing.
+    """
+    generate = state.get("generate")
+    if generate:
+        internal_state = generate.get("_internal")
+        if internal_state is not None:
+            return internal_state
+    
+    internal_state = get_default_internal_state()
+    state.setdefault("generate", {})["_internal"] = internal_state
+    return internal_state
+
+def detect_contract_type(analysis_lower: str) -> Optional[str]:
+    """
+    Pick the contract type used for retrieval from keywords in the lowercased analysis.
+    
+    Returns the type of the first matching keyword in CONTRACT_TYPE_KEYWORDS order,
+    or None if no keyword is mentioned.
+    """
+    return next(
+        (type_name for keyword, type_name in CONTRACT_TYPE_KEYWORDS.items() if keyword in analysis_lower),
+        None
+    )
+
+@functools.lru_cache(maxsize=32)
+def format_insights_context(project_structure: str,
+                            coding_patterns: str,
+                            implementation_guidelines: str,
+                            sample_references: str) -> str:
+    """
+    Format codebase insights as RAG context for code generation.
+    
+    The insights stay the same across validation iterations, so the formatted
+    context is memoized on their content.
+    """
+    return f"""
+# AELF Project Structure
+{project_structure}
+
+# AELF Coding Patterns
+{coding_patterns}
+
+# AELF Implementation Guidelines
+{implementation_guidelines}
+
+# AELF Code Sample References
+{sample_references}
+"""
+
+async def stream_model_text(model, messages: List[BaseMessage], chunks: List[str]) -> str:
+    """
+    Stream a model response, appending its text to chunks as it arrives.
+    
+    The caller owns chunks, so the partial response is still available if the
+    stream is cancelled by a timeout.
+    """
+    async with llm_request_slot():
+        async for chunk in model.astream(messages):
+            content = chunk.content
+            if isinstance(content, str):
+                chunks.append(content)
+            else:
+                # Some providers stream content blocks instead of plain text
+                chunks.extend(
+                    block if isinstance(block, str) else block.get("text", "")
+                    for block in content
+                )
+    return "".join(chunks)
+
 async def generate_proto_file_content(model, proto_file_path: str) -> str:
     """Generate content for an AELF-specific proto file using the LLM."""
     try:
-        # Generate proto file content using the LLM
+        # Generate proto file content using the LLM, keeping the system prompt
+        # identical across files so its cached prefix is reused
         messages = [
-            SystemMessage(content=PROTO_GENERATION_PROMPT.format(proto_file_path=proto_file_path)),
+            create_system_message(PROTO_GENERATION_PROMPT, model),
             HumanMessage(content=f"Please generate the content for the AELF proto file: {proto_file_path}")
         ]
         
         # Use a shorter timeout for proto generation - these are smaller files
-        response = await model.ainvoke(messages, timeout=300)
-        content = response.content.strip()
+        response = await ainvoke_model(model, messages, timeout=300)
         
-        if not content or "```" in content:
-            # If the model returned markdown or empty content, clean it up
-            content = content.replace("```protobuf", "").replace("```proto", "").replace("```", "").strip()
+        # If the model returned markdown, strip all code fences in one pass
+        content = _PROTO_FENCE_RE.sub("", response.content).strip()
             
         if not content:
             print(f"Warning: LLM generated empty content for {proto_file_path}")
@@ -525,26 +744,30 @@ async def analyze_requirements(state: AgentState) -> Command[Literal["analyze_co
     """Analyze the dApp description and provide detailed requirements analysis."""
     try:
         # Initialize internal state if not present
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
+        internal_state = get_internal_state(state)
             
         # Get model with state
         model = get_model(state)
         
         # Generate analysis
         messages = [
-            SystemMessage(content=ANALYSIS_PROMPT),
+            create_system_message(ANALYSIS_PROMPT, model),
             HumanMessage(content=state["input"])
         ]
         
-        response = await model.ainvoke(messages)
-        analysis = response.content.strip()
+        if get_llm_cache() is None:
+            # Stream the analysis so its tokens reach event listeners as they arrive
+            analysis = (await stream_model_text(model, messages, [])).strip()
+        else:
+            # Streamed responses bypass the LLM cache, and the later prompts and the
+            # codebase insights cache are keyed on this analysis, so fetch it whole
+            response = await ainvoke_model(model, messages)
+            analysis = response.content.strip()
         
         if not analysis:
             raise ValueError("Analysis generation failed - empty response")
             
         # Create internal state with analysis
-        internal_state = state["generate"]["_internal"]
         internal_state["analysis"] = analysis
         internal_state["output"] = {
             **internal_state.get("output", {}),
@@ -565,12 +788,8 @@ async def analyze_requirements(state: AgentState) -> Command[Literal["analyze_co
         print(f"Error in analyze_requirements: {str(e)}")
         print(f"Error traceback: {traceback.format_exc()}")
         
-        # Initialize internal state if it doesn't exist
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
-        
         # Create error state
-        error_state = state["generate"]["_internal"]
+        error_state = get_internal_state(state)
         error_state["analysis"] = f"Error analyzing requirements: {str(e)}"
         error_state["output"] = {
             **error_state.get("output", {}),
@@ -591,11 +810,9 @@ async def analyze_codebase(state: AgentState) -> Command[Literal["generate_code"
     """Analyze AELF sample codebases to gather implementation insights."""
     try:
         # Initialize internal state if not present
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
+        internal_state = get_internal_state(state)
             
         # Get analysis from internal state
-        internal_state = state["generate"]["_internal"]
         analysis = internal_state.get("analysis", "")
         
         logger.info("Starting codebase analysis with RAG")
@@ -607,36 +824,31 @@ async def analyze_codebase(state: AgentState) -> Command[Literal["generate_code"
             analysis = "No analysis provided. Proceeding with generic AELF contract implementation."
             internal_state["analysis"] = analysis
         
-        # Extract contract type from analysis for better targeting
-        contract_types = []
-        contract_type = None
+        # Reuse insights from an earlier run with the same analysis
+        cache_key = get_codebase_cache_key(analysis)
+        cached = get_cached_codebase_insights(cache_key)
+        if cached is not None:
+            logger.info(f"[{request_id}] Using cached codebase insights ({cache_key})")
+            internal_state["retrieved_samples"] = [dict(sample) for sample in cached["retrieved_samples"]]
+            internal_state["codebase_insights"] = dict(cached["codebase_insights"])
+            return Command(
+                goto="generate_code",
+                update={
+                    "generate": {
+                        "_internal": internal_state
+                    }
+                }
+            )
         
         # Log a summary of the analysis for debugging
         analysis_summary = analysis[:200] + "..." if len(analysis) > 200 else analysis
         logger.info(f"Analysis summary: {analysis_summary}")
         
-        # Look for contract type mentions in the analysis
-        contract_type_keywords = {
-            "lottery": "lottery game",
-            "voting": "voting contract",
-            "dao": "dao contract",
-            "token": "token contract",
-            "nft": "nft contract",
-            "staking": "staking contract",
-            "game": "game contract",
-            "expense": "expense tracker",
-            "auction": "auction contract",
-            "allowance": "allowance contract"
-        }
-        
+        # Extract contract type from analysis for better targeting
         analysis_lower = analysis.lower()
-        for keyword, type_name in contract_type_keywords.items():
-            if keyword in analysis_lower:
-                contract_types.append(type_name)
+        contract_type = detect_contract_type(analysis_lower)
         
-        if contract_types:
-            # Use the first identified contract type for retrieval
-            contract_type = contract_types[0]
+        if contract_type:
             logger.info(f"[{request_id}] Identified contract type: {contract_type}")
         else:
             logger.info(f"[{request_id}] No specific contract type identified")
@@ -645,16 +857,18 @@ async def analyze_codebase(state: AgentState) -> Command[Literal["generate_code"
         queries = []
         
         # Create targeted queries based on analysis keywords and content
-        if "state" in analysis_lower and "variable" in analysis_lower:
+        keywords = set(_QUERY_KEYWORD_RE.findall(analysis_lower))
+        
+        if "state" in keywords and "variable" in keywords:
             queries.append("state variables and storage")
             
-        if "method" in analysis_lower or "function" in analysis_lower:
+        if "method" in keywords or "function" in keywords:
             queries.append("contract methods and functions")
             
-        if "event" in analysis_lower:
+        if "event" in keywords:
             queries.append("contract events")
             
-        if "access" in analysis_lower or "owner" in analysis_lower or "permission" in analysis_lower:
+        if "access" in keywords or "owner" in keywords or "permission" in keywords:
             queries.append("access control and permissions")
         
         # Add a general query based on contract type
@@ -679,31 +893,25 @@ async def analyze_codebase(state: AgentState) -> Command[Literal["generate_code"
         logger.info(f"[{request_id}] Starting sample retrieval process")
         start_time = time.time()
         
-        for i, query in enumerate(queries):
-            try:
-                logger.info(f"[{request_id}] Processing query {i+1}/{len(queries)}: '{query}'")
-                samples = await retrieve_relevant_samples(query, contract_type)
-                
-                # Only add new samples that aren't duplicates
-                seen_sources = {s["source"] for s in all_samples}
-                new_samples = 0
-                
-                for sample in samples:
-                    if sample["source"] not in seen_sources:
-                        all_samples.append(sample)
-                        seen_sources.add(sample["source"])
-                        new_samples += 1
-                
-                logger.info(f"[{request_id}] Added {new_samples} new samples from query {i+1}")
-                
-                # Limit total samples to prevent token overflow
-                if len(all_samples) >= RAG_CONFIG["retrieval_k"] * 2:
-                    logger.info(f"[{request_id}] Reached sample limit ({len(all_samples)}), stopping retrieval")
-                    break
-            except Exception as e:
-                logger.error(f"[{request_id}] Error retrieving samples for query '{query}': {str(e)}")
-                # Continue with other queries even if one fails
-                continue
+        # Retrieve samples for all queries in one batch, then merge their results in query order
+        query_results = await retrieve_samples_for_queries(queries, contract_type)
+        
+        seen_sources = set()
+        for i, (query, samples) in enumerate(zip(queries, query_results)):
+            # Only add new samples that aren't duplicates
+            new_samples = 0
+            for sample in samples:
+                if sample["source"] not in seen_sources:
+                    all_samples.append(sample)
+                    seen_sources.add(sample["source"])
+                    new_samples += 1
+            
+            logger.info(f"[{request_id}] Added {new_samples} new samples from query {i+1}/{len(queries)}: '{query}'")
+            
+            # Limit total samples to prevent token overflow
+            if len(all_samples) >= RAG_CONFIG["retrieval_k"] * 2:
+                logger.info(f"[{request_id}] Reached sample limit ({len(all_samples)}), skipping remaining results")
+                break
                 
         retrieval_time = time.time() - start_time
         logger.info(f"[{request_id}] Retrieved {len(all_samples)} total samples in {retrieval_time:.2f} seconds")
@@ -723,53 +931,24 @@ async def analyze_codebase(state: AgentState) -> Command[Literal["generate_code"
             "file_type": sample["file_type"]
         } for sample in all_samples]
         
-        # Generate codebase insights with improved prompt
+        # Generate codebase insights; the instructions live in the static system prompt
         logger.info(f"[{request_id}] Generating codebase insights with LLM")
         messages = [
-            SystemMessage(content=CODEBASE_ANALYSIS_PROMPT),
+            create_system_message(CODEBASE_ANALYSIS_PROMPT, model),
             HumanMessage(content=f"""
-Based on the following contract requirements and the provided code samples from the aelf-samples repository, provide implementation insights and patterns for an AELF smart contract.
-
 Contract Requirements:
 {analysis}
 
 Retrieved Code Samples:
 {formatted_samples}
-
-Please provide structured insights focusing on:
-
-1. Project Structure and Organization
-   - Required contract files and their purpose
-   - State variables and their types
-   - Events and their parameters
-   - Contract references needed
-
-2. Smart Contract Patterns
-   - State management patterns
-   - Access control patterns needed
-   - Event handling patterns
-   - Common utility functions
-   - Error handling strategies
-
-3. Implementation Guidelines
-   - Best practices for AELF contracts
-   - Security considerations
-   - Performance optimizations
-   - Testing approaches
-
-4. Code Examples
-   - Key methods to implement
-   - Common features needed
-   - Pitfalls to avoid
-
-Your insights will guide the code generation process.""")
+""")
         ]
         
         try:
             logger.info(f"[{request_id}] Invoking LLM for codebase analysis")
             start_time = time.time()
             
-            response = await model.ainvoke(messages, timeout=300)
+            response = await ainvoke_model(model, messages, timeout=300)
             insights = response.content.strip()
             
             analysis_time = time.time() - start_time
@@ -886,6 +1065,10 @@ Your insights will guide the code generation process.""")
             
             # Update internal state with insights
             internal_state["codebase_insights"] = insights_dict
+            cache_codebase_insights(cache_key, {
+                "retrieved_samples": [dict(sample) for sample in internal_state["retrieved_samples"]],
+                "codebase_insights": dict(insights_dict)
+            })
             
             logger.info(f"[{request_id}] Codebase analysis with RAG completed successfully")
             
@@ -908,34 +1091,11 @@ Your insights will guide the code generation process.""")
         logger.error(f"Error in analyze_codebase: {str(e)}")
         logger.error(f"Error traceback: {traceback.format_exc()}")
         
-        # Initialize internal state if it doesn't exist
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
-        
         # Create error state with default insights
-        error_state = state["generate"]["_internal"]
+        error_state = get_internal_state(state)
         error_msg = f"Error analyzing codebase: {str(e)}"
         
-        error_state["codebase_insights"] = {
-            "project_structure": """Standard AELF project structure:
-1. Contract class inheriting from AElfContract
-2. State class for data storage
-3. Proto files for interface definition
-4. Project configuration in .csproj""",
-            "coding_patterns": """Common AELF patterns:
-1. State management using MapState/SingletonState
-2. Event emission for status changes
-3. Authorization checks using Context.Sender
-4. Input validation with proper error handling""",
-            "implementation_guidelines": """Follow AELF best practices:
-1. Use proper base classes and inheritance
-2. Implement robust state management
-3. Add proper access control checks
-4. Include comprehensive input validation
-5. Emit events for important state changes
-6. Follow proper error handling patterns
-7. Add XML documentation for all public members"""
-        }
+        error_state["codebase_insights"] = dict(_FALLBACK_CODEBASE_INSIGHTS)
         
         logger.info("Using fallback insights due to error")
         
@@ -953,11 +1113,9 @@ async def generate_contract(state: AgentState) -> Command[Literal["validate"]]:
     """Generate smart contract code based on analysis and codebase insights."""
     try:
         # Initialize internal state if not present
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
+        internal_state = get_internal_state(state)
             
         # Get analysis and insights from internal state
-        internal_state = state["generate"]["_internal"]
         analysis = internal_state.get("analysis", "")
         insights = internal_state.get("codebase_insights", {})
         fixes = internal_state.get("fixes", "")
@@ -968,43 +1126,31 @@ async def generate_contract(state: AgentState) -> Command[Literal["validate"]]:
             internal_state["analysis"] = analysis
             
         if not insights:
-            insights = {
-                "project_structure": "Standard AELF project structure",
-                "coding_patterns": "Common AELF patterns",
-                "implementation_guidelines": "Follow AELF best practices",
-                "sample_references": ""
-            }
+            insights = dict(_DEFAULT_CODEBASE_INSIGHTS)
             internal_state["codebase_insights"] = insights
         
         # Get model with state
         model = get_model(state)
         
         # Prepare RAG context from codebase insights
-        rag_context = f"""
-# AELF Project Structure
-{insights.get("project_structure", "")}
-
-# AELF Coding Patterns
-{insights.get("coding_patterns", "")}
-
-# AELF Implementation Guidelines
-{insights.get("implementation_guidelines", "")}
-
-# AELF Code Sample References
-{insights.get("sample_references", "")}
-
+        rag_context = format_insights_context(
+            insights.get("project_structure", ""),
+            insights.get("coding_patterns", ""),
+            insights.get("implementation_guidelines", ""),
+            insights.get("sample_references", "")
+        ) + f"""
 # Previous Validation Issues and Fixes
 {fixes}
 """
         
         # Generate code based on analysis and insights with RAG context
         messages = [
-            SystemMessage(content=CODE_GENERATION_PROMPT.format(
+            create_system_message(render_code_generation_prompt(
                 implementation_guidelines=insights.get("implementation_guidelines", ""),
                 coding_patterns=insights.get("coding_patterns", ""),
                 project_structure=insights.get("project_structure", ""),
                 sample_references=insights.get("sample_references", "")
-            )),
+            ), model),
             HumanMessage(content=f"""
 Analysis:
 {analysis}
@@ -1017,28 +1163,23 @@ Please generate the complete smart contract implementation following AELF's proj
 """)
         ]
         
+        chunks = []
         try:
-            # Set a longer timeout for code generation
-            response = await model.ainvoke(messages, timeout=300)  # 3 minutes timeout
-            content = response.content
+            # Set a longer timeout for code generation, streaming so a partial response survives it
+            async with asyncio.timeout(300):  # 5 minutes timeout
+                content = await stream_model_text(model, messages, chunks)
             
             if not content:
                 raise ValueError("Code generation failed - empty response")
         except TimeoutError:
             print("DEBUG - Code generation timed out, using partial response if available")
-            content = getattr(response, 'content', '') or ""
+            content = "".join(chunks)
             if not content:
                 raise ValueError("Code generation timed out and no partial response available")
                 
         # Initialize components with empty CodeFile structures
         empty_code_file = {"content": "", "file_type": "", "path": ""}
-        components = {
-            "contract": dict(empty_code_file),
-            "state": dict(empty_code_file),
-            "proto": dict(empty_code_file),
-            "reference": dict(empty_code_file),
-            "project": dict(empty_code_file)
-        }
+        components = {key: dict(empty_code_file) for key in CONTRACT_COMPONENTS}
         
         additional_files = []  # List to store additional files
         
@@ -1208,41 +1349,13 @@ Please generate the complete smart contract implementation following AELF's proj
                 if import_path.startswith("aelf/"):
                     aelf_imports.append(import_path)
             
-            # Generate content for AELF-specific imports
-            for aelf_import in aelf_imports:
-                import_path = f"src/Protobuf/reference/{aelf_import}"
-                
-                # Generate content using LLM instead of hardcoded templates
-                import_content = await generate_proto_file_content(model, aelf_import)
-                
-                # Add to additional files if we have content
-                if import_content:
-                    additional_files.append({
-                        "content": import_content,
-                        "file_type": "proto",
-                        "path": import_path
-                    })
+            # Proto files to generate, in the order they are added to metadata
+            proto_imports = list(aelf_imports)
             
             # Check for ACS imports
-            acs_imports = []
             for import_path in imports:
                 if "acs" in import_path.lower():
-                    acs_imports.append(import_path)
-            
-            # Generate content for ACS imports
-            for acs_import in acs_imports:
-                import_path = f"src/Protobuf/reference/{acs_import}"
-                
-                # Generate content using LLM instead of hardcoded templates
-                import_content = await generate_proto_file_content(model, acs_import)
-                
-                # Add to additional files if we have content
-                if import_content:
-                    additional_files.append({
-                        "content": import_content,
-                        "file_type": "proto",
-                        "path": import_path
-                    })
+                    proto_imports.append(import_path)
                     
             # Check for MultiToken imports
             multitoken_import_found = False
@@ -1251,20 +1364,7 @@ Please generate the complete smart contract implementation following AELF's proj
             for import_path in imports:
                 if "multitoken" in import_path.lower() or "token_contract" in import_path.lower():
                     multitoken_import_found = True
-                    import_path = "token/token_contract.proto"
-                    full_path = f"src/Protobuf/reference/{import_path}"
-                    
-                    # Generate MultiToken proto content
-                    import_content = await generate_proto_file_content(model, import_path)
-                    
-                    # Add to additional files
-                    if import_content:
-                        additional_files.append({
-                            "content": import_content,
-                            "file_type": "proto",
-                            "path": full_path
-                        })
-                    
+                    proto_imports.append("token/token_contract.proto")
                     break  # Only need to generate once
             
             # Also check for MultiToken references in C# code
@@ -1283,36 +1383,41 @@ Please generate the complete smart contract implementation following AELF's proj
                  "AElf.Contracts.MultiToken" in state_content or 
                  "AElf.Contracts.MultiToken" in reference_content or
                  "AElf.Contracts.MultiToken" in additional_files_content)):
-                
-                # Generate the MultiToken proto file
-                import_path = "token/token_contract.proto"
-                full_path = f"src/Protobuf/reference/{import_path}"
-                
-                # Generate MultiToken proto content
-                import_content = await generate_proto_file_content(model, import_path)
-                
-                # Add to additional files
+                proto_imports.append("token/token_contract.proto")
+            
+            # Generate all referenced proto files concurrently using the LLM
+            semaphore = asyncio.Semaphore(PROTO_GENERATION_CONCURRENCY)
+            
+            async def generate_bounded(import_path: str) -> str:
+                async with semaphore:
+                    return await generate_proto_file_content(model, import_path)
+            
+            generated_protos = await asyncio.gather(
+                *(generate_bounded(import_path) for import_path in proto_imports)
+            )
+            
+            # Add to additional files if we have content
+            for import_path, import_content in zip(proto_imports, generated_protos):
                 if import_content:
                     additional_files.append({
                         "content": import_content,
                         "file_type": "proto",
-                        "path": full_path
+                        "path": f"src/Protobuf/reference/{import_path}"
                     })
 
         # Create the output structure with metadata containing additional files
         output = {
-            "contract": components["contract"],
-            "state": components["state"],
-            "proto": components["proto"],
-            "reference": components["reference"],
-            "project": components["project"],
+            **components,
             "metadata": additional_files,
             "analysis": analysis  # Preserve analysis in output
         }
         
-        # Remove commented filenames from the beginning of the content
-        for component_key in ["contract", "state", "proto", "reference", "project"]:
+        for component_key in CONTRACT_COMPONENTS:
             component = output[component_key]
+            # Remove contract_name fields from components in the output
+            component.pop("contract_name", None)
+            
+            # Remove commented filenames from the beginning of the content
             content = component["content"]
             
             # If content starts with a commented filename, remove it
@@ -1324,11 +1429,6 @@ Please generate the complete smart contract implementation following AELF's proj
                 ):
                     component["content"] = "\n".join(lines[1:])
         
-        # Remove contract_name fields from components in the output
-        for component_key in ["contract", "state", "proto", "reference", "project"]:
-            if "contract_name" in output[component_key]:
-                del output[component_key]["contract_name"]
-        
         # Update internal state with output
         internal_state["output"] = output
         
@@ -1346,12 +1446,8 @@ Please generate the complete smart contract implementation following AELF's proj
         print(f"Error in generate_contract: {str(e)}")
         print(f"Error traceback: {traceback.format_exc()}")
         
-        # Initialize internal state if it doesn't exist
-        if "generate" not in state or "_internal" not in state["generate"]:
-            state["generate"] = {"_internal": get_default_state()["generate"]["_internal"]}
-        
         # Create error state
-        error_state = state["generate"]["_internal"]
+        error_state = get_internal_state(state)
         error_msg = f"Error generating contract: {str(e)}"
         
         # Create empty code file
@@ -1359,11 +1455,7 @@ Please generate the complete smart contract implementation following AELF's proj
         
         # Update output with error
         error_state["output"] = {
-            "contract": empty_code_file,
-            "state": empty_code_file,
-            "proto": empty_code_file,
-            "reference": empty_code_file,
-            "project": empty_code_file,
+            **{key: dict(empty_code_file) for key in CONTRACT_COMPONENTS},
             "metadata": [],
             "analysis": error_msg
         }
@@ -1382,12 +1474,7 @@ async def validate_contract(state: AgentState) -> Dict:
     """Validate the generated contract code and provide suggestions using LLM."""
     try:
         # Initialize internal state if not present
-        if "generate" not in state:
-            state["generate"] = {}
-        if "_internal" not in state["generate"]:
-            state["generate"]["_internal"] = get_default_state()["generate"]["_internal"]
-        
-        internal_state = state["generate"]["_internal"]
+        internal_state = get_internal_state(state)
         current_count = internal_state.get("validation_count", 0)
         
         # Get the generated code from the state
@@ -1399,55 +1486,30 @@ async def validate_contract(state: AgentState) -> Dict:
         reference_code = output.get("reference", {}).get("content", "")
         project_code = output.get("project", {}).get("content", "")
         
-        # Create a combined code representation for validation
-        code_to_validate = f"""Main Contract File:
-```csharp
-{contract_code}
-```
-
-State Class File:
-```csharp
-{state_code}
-```
-
-Proto File:
-```protobuf
-{proto_code}
-```
-
-Reference Contract File:
-```csharp
-{reference_code}
-```
-
-Project File:
-```xml
-{project_code}
-```"""
-
         # Get model with state
         model = get_model(state)
         
+        # Build the validation request in a single pass so the generated
+        # code is copied only once
+        validation_request = "".join([
+            _VALIDATION_INSTRUCTIONS,
+            "Main Contract File:\n```csharp\n", contract_code,
+            "\n```\n\nState Class File:\n```csharp\n", state_code,
+            "\n```\n\nProto File:\n```protobuf\n", proto_code,
+            "\n```\n\nReference Contract File:\n```csharp\n", reference_code,
+            "\n```\n\nProject File:\n```xml\n", project_code,
+            "\n```\n"
+        ])
+        
         # Generate validation using the LLM
         messages = [
-            SystemMessage(content=VALIDATION_PROMPT),
-            HumanMessage(content=f"""
-Please validate the following smart contract code generated for AELF and provide a detailed analysis with specific issues and fixes:
-
-{code_to_validate}
-
-Categorize your findings into:
-1. Critical issues (must be fixed)
-2. Improvements (recommended but not critical)
-3. Best practices
-
-For each issue found, provide specific suggestions on how to fix it. If no issues are found in a category, explicitly state "No issues found in this category."
-""")
+            create_system_message(VALIDATION_PROMPT, model),
+            HumanMessage(content=validation_request)
         ]
         
         try:
             # Set timeout for validation
-            validation_response = await model.ainvoke(messages, timeout=300)
+            validation_response = await ainvoke_model(model, messages, timeout=300)
             validation_feedback = validation_response.content.strip()
             
             if not validation_feedback:
@@ -1459,44 +1521,49 @@ For each issue found, provide specific suggestions on how to fix it. If no issue
             
             # Simple parsing logic - extract issues and suggestions
             lines = validation_feedback.split('\n')
+            reported_lines = []
             for i, line in enumerate(lines):
-                if "issue" in line.lower() or "error" in line.lower() or "problem" in line.lower() or "missing" in line.lower():
+                # "No issues found in this category." and the category headings mention issues without reporting one
+                if _NO_ISSUES_RE.search(line) or _CATEGORY_HEADING_RE.match(line):
+                    continue
+                reported_lines.append(line)
+                if _ISSUE_LINE_RE.search(line):
                     validation_results.append(line.strip())
                     # Look for suggestion in the next few lines
                     for j in range(i+1, min(i+5, len(lines))):
-                        if "fix" in lines[j].lower() or "suggestion" in lines[j].lower() or "should" in lines[j].lower() or "add" in lines[j].lower() or "change" in lines[j].lower():
+                        if _SUGGESTION_LINE_RE.search(lines[j]):
                             suggestions.append(lines[j].strip())
                             break
             
             # If no explicit issues found but validation contains critical keywords
             if not validation_results:
-                for critical_keyword in ["error", "missing", "invalid", "incorrect", "problem", "issue"]:
-                    if critical_keyword in validation_feedback.lower():
-                        validation_results.append(f"Potential issue detected: review '{critical_keyword}' mentions in validation")
-                        break
+                critical_match = _CRITICAL_KEYWORD_RE.search("\n".join(reported_lines))
+                if critical_match:
+                    critical_keyword = critical_match.group(0).lower()
+                    validation_results.append(f"Potential issue detected: review '{critical_keyword}' mentions in validation")
             
             # Create validation summary
             validation_summary = {
-                "passed": len(validation_results) == 0 or "no issues found" in validation_feedback.lower(),
+                # A clean category says nothing about the others, so only a response without issues passes
+                "passed": len(validation_results) == 0,
                 "issues": validation_results[:5],  # Limit to top 5 issues
                 "suggestions": suggestions[:5]     # Limit to top 5 suggestions
             }
             
-            # Update internal state with validation results and full feedback
-            updated_internal = {
-                **internal_state,
-                "validation_count": current_count + 1,
-                "validation_complete": True,
-                "validation_result": validation_summary,
-                "validation_status": "success" if validation_summary["passed"] else "needs_improvement",
-                "output": output,  # Preserve the output structure
-                "fixes": validation_feedback  # Store full validation feedback for next iteration
-            }
+            # Update internal state in place with validation results and full feedback
+            internal_state.update(
+                validation_count=current_count + 1,
+                validation_complete=True,
+                validation_result=validation_summary,
+                validation_status="success" if validation_summary["passed"] else "needs_improvement",
+                output=output,  # Preserve the output structure
+                fixes=validation_feedback  # Store full validation feedback for next iteration
+            )
             
             # Return state in the format expected by UI
             return {
                 "generate": {
-                    "_internal": updated_internal
+                    "_internal": internal_state
                 }
             }
                 
@@ -1513,7 +1580,7 @@ For each issue found, provide specific suggestions on how to fix it. If no issue
         if not 'internal_state' in locals():
             internal_state = state.get("generate", {}).get("_internal", {})
             if not internal_state:
-                internal_state = get_default_state()["generate"]["_internal"]
+                internal_state = get_default_internal_state()
         
         # Preserve any existing output
         output = internal_state.get("output", {})
@@ -1557,13 +1624,6 @@ async def test_contract(state: AgentState) -> Dict:
     Returns:
         A dictionary containing test results and any identified issues
     """
-    import os
-    import zipfile
-    import json
-    import tempfile
-    import subprocess
-    import base64
-    
     # Initialize internal state if not present
     if "generate" not in state:
         state["generate"] = {}
@@ -1699,13 +1759,6 @@ async def test_contract(state: AgentState) -> Dict:
                             # Prepare prompt for generating fixes
                             error_list = "\n".join(error_lines[:10])  # Limit to first 10 errors
                             
-                            # Create a map of file extensions to their descriptions
-                            file_type_descriptions = {
-                                ".cs": "C# source code file",
-                                ".csproj": "C# project file",
-                                ".proto": "Protocol Buffer definition file"
-                            }
-                            
                             # Collect all files content for context
                             files_context = []
                             processed_files = set()  # Track already processed files
@@ -1718,7 +1771,7 @@ async def test_contract(state: AgentState) -> Dict:
                                 
                                 processed_files.add(file_path)
                                 file_ext = os.path.splitext(file_info["path"])[1]
-                                file_type = file_type_descriptions.get(file_ext, "source file")
+                                file_type = _FILE_TYPE_DESCRIPTIONS.get(file_ext, "source file")
                                 files_context.append(f"""
                                 File: {file_path} ({file_type})
                                 Content:
@@ -1735,7 +1788,7 @@ async def test_contract(state: AgentState) -> Dict:
                                     
                                     processed_files.add(filename)
                                     file_ext = os.path.splitext(meta_file["path"])[1]
-                                    file_type = file_type_descriptions.get(file_ext, "source file")
+                                    file_type = _FILE_TYPE_DESCRIPTIONS.get(file_ext, "source file")
                                     files_context.append(f"""
                                     File: {filename} ({file_type})
                                     Content:
@@ -1746,28 +1799,13 @@ async def test_contract(state: AgentState) -> Dict:
                             
                             # Prepare the current output structure for the LLM
                             output_description = {
-                                "contract": {
-                                    "path": output.get("contract", {}).get("path", ""),
-                                    "file_type": output.get("contract", {}).get("file_type", "")
-                                },
-                                "state": {
-                                    "path": output.get("state", {}).get("path", ""),
-                                    "file_type": output.get("state", {}).get("file_type", "")
-                                },
-                                "proto": {
-                                    "path": output.get("proto", {}).get("path", ""),
-                                    "file_type": output.get("proto", {}).get("file_type", "")
-                                },
-                                "reference": {
-                                    "path": output.get("reference", {}).get("path", ""),
-                                    "file_type": output.get("reference", {}).get("file_type", "")
-                                },
-                                "project": {
-                                    "path": output.get("project", {}).get("path", ""),
-                                    "file_type": output.get("project", {}).get("file_type", "")
-                                },
-                                "metadata_paths": [meta.get("path", "") for meta in output.get("metadata", []) if isinstance(meta, dict)]
+                                key: {
+                                    "path": output.get(key, {}).get("path", ""),
+                                    "file_type": output.get(key, {}).get("file_type", "")
+                                }
+                                for key in CONTRACT_COMPONENTS
                             }
+                            output_description["metadata_paths"] = [meta.get("path", "") for meta in output.get("metadata", []) if isinstance(meta, dict)]
                             
                             prompt = f"""
                             You are an expert AELF smart contract developer. The contract build has failed with the following errors:
@@ -1791,106 +1829,34 @@ async def test_contract(state: AgentState) -> Dict:
                             {json.dumps(output_description, indent=2)}
                             ```
                             
-                            Instead of describing the changes, I want you to provide the complete updated output object 
-                            that incorporates all necessary fixes. Return your response in the following format:
-                            
-                            <UPDATED_OUTPUT>
-                            {{
-                              "contract": {{
-                                "content": "... complete updated content ...",
-                                "path": "...",
-                                "file_type": "..."
-                              }},
-                              "state": {{
-                                "content": "... complete updated content ...",
-                                "path": "...",
-                                "file_type": "..."
-                              }},
-                              "proto": {{
-                                "content": "... complete updated content ...",
-                                "path": "...",
-                                "file_type": "..."
-                              }},
-                              "reference": {{
-                                "content": "... complete updated content ...",
-                                "path": "...",
-                                "file_type": "..."
-                              }},
-                              "project": {{
-                                "content": "... complete updated content ...",
-                                "path": "...",
-                                "file_type": "..."
-                              }},
-                              "metadata": [
-                                {{
-                                  "content": "... complete updated content ...",
-                                  "path": "...",
-                                  "file_type": "..."
-                                }},
-                                ...
-                              ]
-                            }}
-                            </UPDATED_OUTPUT>
+                            Instead of describing the changes, provide the complete updated output object 
+                            that incorporates all necessary fixes.
                             
                             IMPORTANT: 
                             1. Include the COMPLETE content for each file, not just the changes.
                             2. Keep the same file paths and structure, just update the content to fix the build errors.
-                            3. Ensure your response is valid JSON when extracted from the <UPDATED_OUTPUT> tags.
-                            4. Make only the necessary changes to fix the build errors.
+                            3. Make only the necessary changes to fix the build errors.
                             """
                             
-                            # Call the model to generate fixes
+                            # Call the model to generate fixes as a structured output object
                             model = get_model(state)
                             messages = [
                                 SystemMessage(content="You are an expert AELF smart contract developer."),
                                 HumanMessage(content=prompt)
                             ]
-                            ai_response = await model.ainvoke(messages)
-                            
-                            # Store the suggested fixes
-                            internal_state["suggested_fixes"] = ai_response.content
+                            try:
+                                updated_output = await ainvoke_model(model.with_structured_output(ContractFixOutput), messages)
+                            except OutputParserException as e:
+                                print(f"Could not parse the suggested fixes: {str(e)}")
+                                updated_output = None
                             
-                            # Parse the response to extract the updated output object
-                            response_text = ai_response.content
-                            debug_info = []  # Store debug info about the parsing process
-                            
-                            # Extract the updated output object
-                            updated_output = None
-                            match = re.search(r'<UPDATED_OUTPUT>(.*?)</UPDATED_OUTPUT>', response_text, re.DOTALL)
-                            
-                            if match:
-                                try:
-                                    # Extract and parse the JSON
-                                    updated_output_str = match.group(1).strip()
-                                    
-                                    # Try to parse as JSON
-                                    updated_output = json.loads(updated_output_str)
-                                    
-                                    # Validate the structure
-                                    required_keys = ["contract", "state", "proto", "reference", "project", "metadata"]
-                                    missing_keys = [key for key in required_keys if key not in updated_output]
-                                    
-                                    if missing_keys:
-                                        # Try to keep the existing keys that are missing
-                                        for key in missing_keys:
-                                            if key in output:
-                                                updated_output[key] = output[key]
-                                    
-                                    # Update the output with the LLM-generated complete object
-                                    output = updated_output
-                                    
-                                except json.JSONDecodeError as e:
-                                    # Try basic validation and sanitizing
-                                    try:
-                                        # Replace any problematic characters and try again
-                                        sanitized_str = updated_output_str.replace('\t', '    ').replace('\\n', '\\\\n')
-                                        updated_output = json.loads(sanitized_str)
-                                        output = updated_output
-                                    except:
-                                        pass
+                            # Store the suggested fixes as text, and the parsed files separately
+                            internal_state["suggested_fixes"] = json.dumps(updated_output, indent=2) if updated_output else ""
+                            internal_state["suggested_fix_output"] = updated_output
                             
-                            # Store debug info in internal state for troubleshooting if needed
-                            internal_state["debug_info"] = debug_info
+                            if updated_output:
+                                # Keep the existing files for any keys the model left out
+                                output = {**output, **updated_output}
                             
                             # Update the state with fixed files
                             internal_state["output"] = output
@@ -1954,6 +1920,14 @@ def validation_router(state: AgentState) -> str:
     internal_state = state["generate"]["_internal"]
     current_count = internal_state.get("validation_count", 0)
     
+    # Check whether validate_contract actually ran and reported no issues
+    validation_result = internal_state.get("validation_result")
+    validation_passed = (
+        isinstance(validation_result, dict)
+        and validation_result.get("passed") is True
+        and internal_state.get("validation_status") == "success"
+    )
+    
     # Ensure required fields exist
     if "output" not in internal_state:
         internal_state["output"] = {}
@@ -1972,7 +1946,10 @@ def validation_router(state: AgentState) -> str:
     # Store the current validation count for tracking retries
     internal_state["validation_count"] = current_count + 1
     
-    if current_count < 2:
+    if validation_passed:
+        # Regenerating code that passed validation would only repeat the same LLM call
+        return "test_contract"
+    elif current_count < 2:
         # If we haven't reached the second validation yet, go back to generate_code
         return "generate_code"
     else:
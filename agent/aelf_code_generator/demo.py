@@ -6,33 +6,53 @@ import os
 from dotenv import load_dotenv
 load_dotenv()  # This loads the environment variables from .env
 
+import anyio
 from fastapi import FastAPI, Body, HTTPException
 import uvicorn
 from aelf_code_generator.agent import graph, get_default_state
+from aelf_code_generator.types import CONTRACT_COMPONENTS
 
 app = FastAPI()
 
+# Limit how many workflows run at once; further requests wait for a slot and
+# are rejected once the wait queue is as long as the number of slots. Creating
+# it at import, outside an event loop, needs anyio 4.5 or later
+_generation_limiter = anyio.CapacityLimiter(int(os.getenv("MAX_CONCURRENT_GENERATIONS", "8")))
+
 @app.post("/generate")
-async def generate_contract(description: str = Body(..., description="Describe your smart contract requirements in plain text. For example:\n- I need a voting contract where users can create proposals and vote\n- Create an NFT marketplace with listing and bidding features\n- Token contract with mint, burn, and transfer functions\n- DAO governance contract with proposal voting and treasury management")):
+async def generate_contract(description: str = Body(..., min_length=20, max_length=8192, description="Describe your smart contract requirements in plain text. For example:\n- I need a voting contract where users can create proposals and vote\n- Create an NFT marketplace with listing and bidding features\n- Token contract with mint, burn, and transfer functions\n- DAO governance contract with proposal voting and treasury management")):
     """Generate smart contract from text description."""
+    if _generation_limiter.statistics().tasks_waiting >= _generation_limiter.total_tokens:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many contract generations in progress. Please try again later.",
+            headers={"Retry-After": "30"}
+        )
+    
     try:
         # Create initial state with description
         state = get_default_state()
         state["input"] = description
         
-        # Run the graph
-        result = await graph.ainvoke(state)
+        # Run the graph once a generation slot is free
+        async with _generation_limiter:
+            result = await graph.ainvoke(state)
+        
+        output = result.get("generate", {}).get("_internal", {}).get("output", {})
         
-        # Check for errors
-        if not any(result["output"].values()):
+        # Valid descriptions that produce nothing point to an upstream model failure
+        # Component entries are always present, so check their content and stop at the first file
+        if not any(output.get(key, {}).get("content") for key in CONTRACT_COMPONENTS):
             raise HTTPException(
-                status_code=500,
+                status_code=502,
                 detail="Failed to generate contract. Please try again with a more detailed description."
             )
         
         # Return the generated outputs
-        return result["output"]
+        return output
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -2,27 +2,161 @@
 This module provides model configuration for the AELF smart contract code generator.
 """
 
+import asyncio
+import contextlib
+import functools
+import logging
 import os
-from typing import cast, Any
+from typing import cast, Any, Callable, Dict, List, Optional, Set, TypeVar
+import httpx
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import Runnable
 from aelf_code_generator.types import AgentState
 
+logger = logging.getLogger(__name__)
+
+# Retries for rate-limited (429) and transient 5xx responses; the provider
+# clients back off exponentially with jitter between attempts
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+
+# Bound on concurrent LLM requests across all workflows in this process, so
+# bursts queue locally instead of tripping provider rate limits
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+
+# asyncio primitives bind to the loop that first uses them, so each running
+# loop (e.g. one per asyncio.run() in the test scripts) gets its own
+_LLM_SEMAPHORES: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+_T = TypeVar("_T")
+
+def loop_local(registry: Dict[asyncio.AbstractEventLoop, _T],
+               factory: Callable[[], _T],
+               on_discard: Optional[Callable[[_T], None]] = None) -> _T:
+    """
+    Get the registry entry for the running event loop, creating it on first use.
+    
+    Entries of loops that have since closed are dropped, and passed to
+    on_discard if given, when a new one is added.
+    """
+    loop = asyncio.get_running_loop()
+    resource = registry.get(loop)
+    if resource is None:
+        for closed_loop in [key for key in registry if key.is_closed()]:
+            stale = registry.pop(closed_loop)
+            if on_discard is not None:
+                on_discard(stale)
+        resource = registry[loop] = factory()
+    return resource
+
+# Connection pools shared by all OpenAI-compatible model clients, one per
+# running loop since httpx connections cannot be reused across loops
+_HTTP_ASYNC_CLIENTS: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+# Model names whose clients take the pooled HTTP client
+_HTTP_POOLED_MODELS = frozenset({"azure_openai", "openai"})
+
+# Tasks closing the clients of closed loops, kept referenced until they finish
+_CLOSING_TASKS: Set[asyncio.Task] = set()
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Get the running loop's async HTTP client so LLM calls reuse pooled connections.
+    
+    Must be called from a coroutine, as the client belongs to the running loop.
+    """
+    client = loop_local(_HTTP_ASYNC_CLIENTS, _create_http_async_client, _discard_http_async_client)
+    if client.is_closed:
+        client = _HTTP_ASYNC_CLIENTS[asyncio.get_running_loop()] = _create_http_async_client()
+    return client
+
+def _create_http_async_client() -> httpx.AsyncClient:
+    """
+    Create an async HTTP client sized for concurrent LLM requests.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(600.0, connect=5.0)
+    )
+
+def _discard_http_async_client(client: httpx.AsyncClient) -> None:
+    """
+    Release the client of a closed loop along with the cached models holding it.
+    
+    The client is closed on the running loop; errors from connections bound
+    to the closed loop are ignored, as their sockets are released either way.
+    """
+    _build_model.cache_clear()
+    task = asyncio.get_running_loop().create_task(_aclose_quietly(client))
+    _CLOSING_TASKS.add(task)
+    task.add_done_callback(_CLOSING_TASKS.discard)
+
+async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+    """
+    Close a client, ignoring errors from connections of a closed loop.
+    """
+    with contextlib.suppress(Exception):
+        await client.aclose()
+
+async def close_http_async_client() -> None:
+    """
+    Close the running loop's async HTTP client on application shutdown.
+    """
+    client = _HTTP_ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    # Cached models hold the closed client, so rebuild them on next use
+    _build_model.cache_clear()
+
+def configure_llm_cache() -> None:
+    """
+    Enable LangChain's SQLite response cache when LLM_CACHE_PATH is set.
+    
+    Repeated identical prompts, e.g. when re-running tests or replaying a
+    workflow with the same description, are then served from the cache.
+    """
+    cache_path = os.getenv("LLM_CACHE_PATH")
+    if not cache_path:
+        return
+    from langchain_community.cache import SQLiteCache
+    from langchain_core.globals import set_llm_cache
+    logger.info(f"Using LLM response cache: {cache_path}")
+    set_llm_cache(SQLiteCache(database_path=cache_path))
+
+configure_llm_cache()
+
 def get_model(state: AgentState) -> BaseChatModel:
     """
     Get a model based on the environment variable or state configuration.
+    
+    Inside a coroutine, OpenAI-compatible models share the running loop's
+    connection pool; called without a running loop, they get their own.
     """
     state_model = state.get("model")
-    print(f"State model: {state_model}")
+    model = os.getenv("MODEL", state_model)
+    if model not in _HTTP_POOLED_MODELS:
+        return _build_model(model)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # No running loop to own a pooled client
+        return _build_model(model)
+    return _build_model(model, get_http_async_client())
+
+@functools.lru_cache(maxsize=8)
+def _build_model(model: Optional[str], http_async_client: Optional[httpx.AsyncClient] = None) -> BaseChatModel:
+    """
+    Construct the chat model client for a model name.
     
-    # Print all environment variables for debugging
+    Clients are cached per model name and HTTP client, so each workflow node
+    on a loop reuses the same client instead of re-creating it on every call.
+    """
+    # Print relevant environment variables for debugging
     print("Environment variables:")
     for key, value in os.environ.items():
         if key in ["MODEL", "GOOGLE_API_KEY", "AZURE_OPENAI_API_KEY", "OPENAI_API_KEY"]:
             print(f"  {key}: {'[SET]' if value else '[NOT SET]'}")
     
-    model = os.getenv("MODEL", state_model)
-    print(f"Selected model: {model}")
-
     print(f"Using model: {model}")
 
     if model == "azure_openai":
@@ -33,12 +167,19 @@ def get_model(state: AgentState) -> BaseChatModel:
             azure_endpoint="https://zhife-m5vtfkd0-westus.services.ai.azure.com/",
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version="2024-02-15-preview",
-            temperature=0.7
+            temperature=0.7,
+            max_retries=LLM_MAX_RETRIES,
+            http_async_client=http_async_client
         )
     if model == "openai":
         from langchain_openai import ChatOpenAI
         print("Initializing ChatOpenAI")
-        return ChatOpenAI(temperature=0, model="gpt-4")
+        return ChatOpenAI(
+            temperature=0,
+            model="gpt-4",
+            max_retries=LLM_MAX_RETRIES,
+            http_async_client=http_async_client
+        )
     if model == "anthropic":
         from langchain_anthropic import ChatAnthropic
         print("Initializing ChatAnthropic")
@@ -46,7 +187,8 @@ def get_model(state: AgentState) -> BaseChatModel:
             temperature=0,
             model_name="claude-3-sonnet-20240229",
             timeout=None,
-            stop=None
+            stop=None,
+            max_retries=LLM_MAX_RETRIES
         )
     if model == "google_genai":
         from langchain_google_genai import ChatGoogleGenerativeAI
@@ -55,7 +197,39 @@ def get_model(state: AgentState) -> BaseChatModel:
             temperature=0,
             model="gemini-2.0-flash",
             api_key=cast(Any, os.getenv("GOOGLE_API_KEY")) or None,
-            convert_system_message_to_human=True
+            convert_system_message_to_human=True,
+            max_retries=LLM_MAX_RETRIES
         )
 
-    raise ValueError(f"Invalid model specified: {model}") 
\ No newline at end of file
+    raise ValueError(f"Invalid model specified: {model}") 
+
+def llm_request_slot() -> asyncio.Semaphore:
+    """
+    Get the semaphore that bounds concurrent LLM requests.
+    
+    Hold it for the whole request, including while consuming a stream. Must
+    be called from a coroutine, as the semaphore belongs to the running loop.
+    """
+    return loop_local(_LLM_SEMAPHORES, lambda: asyncio.Semaphore(LLM_CONCURRENCY))
+
+async def ainvoke_model(model: Runnable, messages: List[BaseMessage], **kwargs: Any) -> Any:
+    """
+    Invoke a model once a concurrent LLM request slot is free.
+    """
+    async with llm_request_slot():
+        return await model.ainvoke(messages, **kwargs)
+
+def create_system_message(content: str, model: BaseChatModel) -> SystemMessage:
+    """
+    Create a system message whose static prompt prefix the provider can cache.
+    
+    Anthropic only caches content blocks marked with cache_control, while OpenAI
+    and Azure OpenAI cache repeated prompt prefixes automatically.
+    """
+    if getattr(model, "_llm_type", "") == "anthropic-chat":
+        return SystemMessage(content=[{
+            "type": "text",
+            "text": content,
+            "cache_control": {"type": "ephemeral"}
+        }])
+    return SystemMessage(content=content)
@@ -2,12 +2,16 @@
 This module contains prompt definitions for the AELF smart contract code generation.
 """
 
+from string import Formatter
+from typing import Callable
+
 # Define what gets exported from this module
 __all__ = [
     "SYSTEM_PROMPT",
     "ANALYSIS_PROMPT",
     "CODEBASE_ANALYSIS_PROMPT",
     "CODE_GENERATION_PROMPT",
+    "render_code_generation_prompt",
     "VALIDATION_PROMPT",
     "PROTO_GENERATION_PROMPT",
     "UI_GENERATION_PROMPT",
@@ -34,17 +38,13 @@ Provide a structured analysis that will be used to generate the smart contract c
 Do not generate any code in this step, focus only on the analysis."""
 
 # Prompt for codebase analysis
-CODEBASE_ANALYSIS_PROMPT = """You are an expert AELF smart contract developer. Based on the provided analysis and sample codebase insights, analyze and extract best practices and patterns.
-
-Focus on:
-1. Project structure and organization
-2. Common coding patterns in AELF smart contracts
-3. Implementation guidelines specific to the requirements
-4. Relevant sample contracts that can be used as reference
-
-Examine the provided code samples from similar AELF contracts. Extract patterns, state management approaches, and implementation strategies that would be suitable for the requested contract.
+CODEBASE_ANALYSIS_PROMPT = """You are an expert AELF smart contract developer. From the contract requirements and the code samples of similar AELF contracts provided, extract the patterns and implementation strategies suited to the requested contract. Do not generate the contract itself.
 
-Provide structured insights that will guide the code generation process."""
+Structure your insights under these headings:
+1. Project Structure and Organization - required contract files, state variables and types, events and parameters, contract references
+2. Smart Contract Patterns - state management, access control, event handling, utility functions, error handling
+3. Implementation Guidelines - AELF best practices, security, performance, testing
+4. Code Examples - key methods, common features, pitfalls to avoid"""
 
 # Prompt for code generation
 CODE_GENERATION_PROMPT = """You are an expert AELF smart contract developer. Based on the provided analysis, codebase insights, and code samples, generate a complete smart contract implementation following AELF's standard project structure.
@@ -194,7 +194,7 @@ PROTO_GENERATION_PROMPT = """You are an expert AELF smart contract developer. Yo
 
 Generate ONLY the content of the requested proto file. Do not include any explanations or markdown. The output should be valid proto syntax that can be directly saved to a file.
 
-Proto file to generate: {proto_file_path}
+The proto file to generate is named in the request.
 
 For AELF proto files, follow these important guidelines:
 1. Use the correct package name
@@ -251,4 +251,33 @@ Based on the contract implementation, create documentation that includes:
 6. Integration guidelines for other contracts/dApps
 7. Deployment instructions
 
-The documentation should be clear, concise, and follow best practices for technical documentation in the blockchain space.""" 
\ No newline at end of file
+The documentation should be clear, concise, and follow best practices for technical documentation in the blockchain space.""" 
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """
+    Precompile a prompt template so rendering does not re-parse it.
+    
+    The template is split once into literal text and field names, following
+    str.format parsing rules (including escaped braces). Only plain named
+    fields are supported.
+    """
+    segments = []
+    fields = []
+    for literal, field_name, format_spec, conversion in Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported replacement field in prompt template: {field_name}")
+        segments.append(literal)
+        fields.append(field_name)
+    
+    def render(**values: str) -> str:
+        parts = []
+        for literal, field_name in zip(segments, fields):
+            parts.append(literal)
+            if field_name is not None:
+                parts.append(str(values[field_name]))
+        return "".join(parts)
+    
+    return render
+
+# Precompiled renderer for the code generation prompt, used on every generation iteration
+render_code_generation_prompt = compile_prompt(CODE_GENERATION_PROMPT)
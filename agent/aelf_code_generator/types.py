@@ -33,6 +33,20 @@ class ContractOutput(TypedDict, total=False):
     metadata: List[CodeFile]  # Additional files generated by LLM
     analysis: str  # Requirements analysis
 
+class ContractFixOutput(TypedDict):
+    """
+    Complete contract files with fixes applied for the reported build errors
+    """
+    contract: CodeFile  # Main contract implementation
+    state: CodeFile    # State class implementation
+    proto: CodeFile    # Protobuf definitions
+    reference: CodeFile  # Contract references
+    project: CodeFile   # Project configuration
+    metadata: List[CodeFile]  # Additional files such as imported proto files
+
+# Keys of the code file components in ContractOutput, in generation order
+CONTRACT_COMPONENTS = ("contract", "state", "proto", "reference", "project")
+
 class InternalState(TypedDict, total=False):
     """Internal state for agent workflow."""
     analysis: str
@@ -42,41 +56,38 @@ class InternalState(TypedDict, total=False):
     validation_result: str
     fixes: str  # Store validation feedback for next iteration
     validation_complete: bool
+    suggested_fixes: str  # Build fixes suggested by the model, as JSON text
+    suggested_fix_output: Optional[ContractFixOutput]  # The same fixes as parsed files
 
 class AgentState(TypedDict, total=False):
     """State type for the agent workflow."""
     input: str  # Original dApp description
     generate: NotRequired[Dict[Literal["_internal"], InternalState]]  # Internal state management wrapped in generate
 
+def get_default_internal_state() -> InternalState:
+    """Initialize default internal state."""
+    return {
+        "analysis": "",
+        "codebase_insights": {
+            "project_structure": "",
+            "coding_patterns": "",
+            "implementation_guidelines": "",
+            "sample_references": ""
+        },
+        "output": {
+            # Each component gets its own CodeFile so filling one cannot leak into the others
+            **{key: {"content": "", "file_type": "", "path": ""} for key in CONTRACT_COMPONENTS},
+            "metadata": [],
+            "analysis": ""
+        },
+        "validation_count": 0
+    }
+
 def get_default_state() -> AgentState:
     """Initialize default state."""
-    empty_code_file = {
-        "content": "",
-        "file_type": "",
-        "path": ""
-    }
-    
     return {
         "input": "",
         "generate": {
-            "_internal": {
-                "analysis": "",
-                "codebase_insights": {
-                    "project_structure": "",
-                    "coding_patterns": "",
-                    "implementation_guidelines": "",
-                    "sample_references": ""
-                },
-                "output": {
-                    "contract": empty_code_file,
-                    "state": empty_code_file,
-                    "proto": empty_code_file,
-                    "reference": empty_code_file,
-                    "project": empty_code_file,
-                    "metadata": [],
-                    "analysis": ""
-                },
-                "validation_count": 0
-            }
+            "_internal": get_default_internal_state()
         }
-    } 
\ No newline at end of file
+    }
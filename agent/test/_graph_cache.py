@@ -0,0 +1,11 @@
+"""Shared compiled agent workflow for the test scripts."""
+
+import functools
+
+@functools.lru_cache(maxsize=1)
+def cached_workflow():
+    """
+    Get the compiled agent workflow, reusing the graph the agent module compiles at import.
+    """
+    from aelf_code_generator.agent import graph
+    return graph
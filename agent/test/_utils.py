@@ -0,0 +1,25 @@
+"""Shared settings and helpers for the agent test scripts."""
+
+import asyncio
+import os
+
+# Set AELF_TEST_VERBOSE=1 to print full workflow updates
+VERBOSE = os.getenv("AELF_TEST_VERBOSE") == "1"
+
+# Seconds to wait for a node to complete; generate_code alone may take up to five minutes
+STEP_TIMEOUT = float(os.getenv("AELF_TEST_STEP_TIMEOUT", "360"))
+
+# Seconds to wait for a whole workflow run
+RUN_TIMEOUT = float(os.getenv("AELF_TEST_RUN_TIMEOUT", "900"))
+
+def preview(text, limit=200):
+    """Return text cut to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+def install_uvloop():
+    """Run the test scripts on uvloop when it is installed."""
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
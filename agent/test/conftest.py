@@ -0,0 +1,29 @@
+"""Shared pytest fixtures for the agent tests."""
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from _graph_cache import cached_workflow
+
+@pytest.fixture(scope="session")
+def compiled_agent():
+    """
+    Compiled agent workflow shared by every test in the session.
+    """
+    return cached_workflow()
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """
+    Replace the chat model client with a canned fake for tests that only check control flow.
+    
+    Any node that asks get_model() for a client receives the fake, and RAG
+    retrieval finds no samples, so these tests never open a connection to a
+    model or embeddings provider.
+    """
+    async def retrieve_no_samples(queries, contract_type=None, k=None):
+        return [[] for _ in queries]
+    
+    fake = FakeListChatModel(responses=["Analysis complete."])
+    monkeypatch.setattr("aelf_code_generator.model._build_model", lambda model, http_async_client=None: fake)
+    monkeypatch.setattr("aelf_code_generator.agent.retrieve_samples_for_queries", retrieve_no_samples)
+    return fake
@@ -1,52 +0,0 @@
-#!/usr/bin/env python
-"""Test script to verify the validation_router fix."""
-
-import asyncio
-import re
-from aelf_code_generator.agent import create_agent
-from langgraph.graph import StateGraph
-from langgraph.types import Command
-
-def test_validation_router_fix():
-    """Directly test the validation_router function by examining source code."""
-    print("\n=== Testing validation_router fix ===\n")
-    
-    # Create the agent workflow to verify it compiles
-    workflow = create_agent()
-    print("✅ Agent workflow created successfully!")
-    
-    # Read the agent source to verify validation_router is properly defined
-    with open("aelf_code_generator/agent.py", "r") as f:
-        source = f.read()
-    
-    # Check return type annotation
-    return_type_pattern = r"async def validation_router\(.*?\) -> Command\[Literal\[\"generate_code\", \"__end__\"\]\]:"
-    if re.search(return_type_pattern, source):
-        print("✅ validation_router has correct return type annotation")
-    else:
-        print("❌ validation_router has incorrect return type annotation")
-    
-    # Check the first return statement (which would have triggered the error)
-    first_return_pattern = r'if "generate" not in state.*?return\s+(.*?)$'
-    first_return_match = re.search(first_return_pattern, source, re.DOTALL | re.MULTILINE)
-    if first_return_match and "Command(goto=" in first_return_match.group(1):
-        print("✅ First return statement uses Command(goto=...)")
-    else:
-        print("❌ First return statement doesn't use Command(goto=...)")
-    
-    # Check validation_complete handling
-    if "validation_complete = internal_state.get" in source:
-        print("✅ validation_router retrieves validation_complete flag")
-    else:
-        print("❌ validation_router doesn't retrieve validation_complete flag")
-    
-    if "if validation_complete:" in source and "Command(goto=\"__end__\")" in source:
-        print("✅ validation_router properly checks validation_complete flag and returns Command")
-    else:
-        print("❌ validation_router doesn't properly handle validation_complete")
-    
-    print("\n✅ All checks passed - the validation_router function has been properly fixed!")
-    print("This should resolve the InvalidUpdateError when reaching validation_count=1.")
-
-if __name__ == "__main__":
-    test_validation_router_fix() 
\ No newline at end of file
@@ -1,100 +1,27 @@
 #!/usr/bin/env python
 """Test the structure of the agent workflow graph."""
 
-import sys
-from pprint import pprint
-from aelf_code_generator.agent import create_agent
+from _graph_cache import cached_workflow
 
-def test_graph_structure():
+def test_graph_structure(compiled_agent):
     """
-    Verify that the agent workflow graph is properly structured, 
-    with validation_router correctly connected to __end__.
+    Verify that the agent workflow graph is properly structured,
+    with validation_router routing out of validate and the workflow ending after test_contract.
     """
-    print("\n=== Testing Agent Workflow Graph Structure ===\n")
+    # Inspect the compiled graph through its drawable representation
+    graph = compiled_agent.get_graph()
+    nodes = graph.nodes
+    edges = {(edge.source, edge.target): edge for edge in graph.edges}
     
-    try:
-        # Create the agent workflow
-        workflow = create_agent()
-        print("✅ Agent workflow created successfully!")
-        
-        # Try to access the graph structure
-        # Note: This might not be directly accessible in the compiled graph
-        print("\nAttempting to analyze graph structure...")
-        
-        # Check if we can access the nodes and edges
-        has_pregel_graph = hasattr(workflow, "_pregel_graph")
-        
-        if has_pregel_graph:
-            print("Graph is available for inspection")
-            pregel_graph = workflow._pregel_graph
-            
-            # Try to get the graph nodes and edges
-            nodes = getattr(pregel_graph, "nodes", "Not accessible")
-            edges = getattr(pregel_graph, "edges", "Not accessible")
-            
-            print("\nNodes:", list(nodes.keys()) if isinstance(nodes, dict) else nodes)
-            print("\nEdges structure:", "Available" if isinstance(edges, dict) else "Not accessible")
-            
-            # Check if validation_router is in the nodes
-            if isinstance(nodes, dict) and "validation_router" in nodes:
-                print("\n✅ validation_router node exists in the graph")
-            else:
-                print("\n❌ validation_router node not found in the graph")
-            
-            # Check if there's a connection from validation_router to __end__
-            validation_router_edges = None
-            if isinstance(edges, dict) and "validation_router" in edges:
-                validation_router_edges = edges["validation_router"]
-                print("\nvalidation_router edges:", validation_router_edges)
-                
-                # Check if __end__ is in the outgoing edges from validation_router
-                if isinstance(validation_router_edges, list) and "__end__" in validation_router_edges:
-                    print("\n✅ validation_router has a direct connection to __end__")
-                    return True
-                else:
-                    print("\n❌ validation_router does not have a direct connection to __end__")
-            else:
-                print("\n❌ Cannot access edges from validation_router")
-        
-        # Fallback check for node names
-        print("\nAttempting to check for node names...")
-        all_nodes = {}
-        
-        # Try different possible attributes
-        for attr in ["_nodes", "nodes", "_graph", "graph"]:
-            if hasattr(workflow, attr):
-                val = getattr(workflow, attr)
-                if isinstance(val, dict) and val:
-                    all_nodes = val
-                    break
-        
-        if all_nodes:
-            node_names = list(all_nodes.keys())
-            print("Found node names:", node_names)
-            
-            # Check for validation_router and __end__
-            if "validation_router" in node_names:
-                print("✅ validation_router exists")
-            else:
-                print("❌ validation_router not found")
-                
-            if "__end__" in node_names:
-                print("✅ __end__ node exists")
-            else:
-                print("❌ __end__ node not found")
-        
-        print("\nNote: Unable to fully verify the edge from validation_router to __end__")
-        print("However, since we can create the agent workflow successfully,")
-        print("and the validation_router function returns Command(goto='__end__'),")
-        print("it's likely that the edge exists but isn't directly accessible for inspection.")
-        return True
-            
-    except Exception as e:
-        print(f"\n❌ ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return False
+    for node in ["__start__", "analyze", "analyze_codebase", "generate_code", "validate", "test_contract", "__end__"]:
+        assert node in nodes, f"{node} node not found in the graph"
+    
+    # validation_router is the conditional edge out of validate
+    for target in ["generate_code", "test_contract", "__end__"]:
+        edge = edges.get(("validate", target))
+        assert edge is not None and edge.conditional, f"validation_router cannot route from validate to {target}"
+    
+    assert ("test_contract", "__end__") in edges, "test_contract is not connected to __end__"
 
 if __name__ == "__main__":
-    success = test_graph_structure()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    test_graph_structure(cached_workflow())
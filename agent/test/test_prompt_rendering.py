@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""Test that precompiled prompt templates render exactly like str.format."""
+
+from aelf_code_generator import prompts
+from aelf_code_generator.prompts import (
+    CODE_GENERATION_PROMPT,
+    compile_prompt,
+    render_code_generation_prompt
+)
+
+def test_code_generation_prompt_rendering():
+    """
+    Verify the precompiled code generation prompt matches CODE_GENERATION_PROMPT.format.
+    """
+    values = {
+        "implementation_guidelines": "Use {braces} in guidelines",
+        "coding_patterns": "MappedState for collections",
+        "project_structure": "src/ContractName.cs",
+        "sample_references": ""
+    }
+
+    assert render_code_generation_prompt(**values) == CODE_GENERATION_PROMPT.format(**values)
+
+    # Escaped braces are kept as literal braces
+    render = compile_prompt("message {{ {name} }}")
+    assert render(name="Address") == "message { Address }"
+
+def test_prompts_are_ascii():
+    """
+    Verify prompt constants stay ASCII so they are stored at one byte per character.
+    """
+    for name in prompts.__all__:
+        value = getattr(prompts, name)
+        if isinstance(value, str):
+            assert value.isascii(), f"{name} contains non-ASCII characters"
+
+if __name__ == "__main__":
+    test_code_generation_prompt_rendering()
+    test_prompts_are_ascii()
@@ -1,38 +1,30 @@
 #!/usr/bin/env python
 """Test script to verify the agent workflow with validation_complete=True."""
 
-import asyncio
-from aelf_code_generator.agent import create_agent
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
 from aelf_code_generator.types import get_default_state
 
-async def test_workflow_with_validation_complete():
+# Run every test on the session event loop shared with test_workflows
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+async def test_workflow_with_validation_complete(compiled_agent):
     """
     Test that the agent workflow can handle validation_complete=True properly.
-    This test simulates a state where validation_count=1 and validation_complete=True,
-    which should trigger the validation_router to return Command(goto="__end__").
+    A validation_complete flag without a passed validation result must not end
+    the retries, so validation_router sends the workflow back to generate_code.
     """
-    print("\n=== Testing agent workflow with validation_complete=True ===\n")
+    # Compile the same graph with a checkpointer so its state can be staged
+    workflow = compiled_agent.builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "validation-flow"}}
     
-    try:
-        # Create the agent workflow
-        workflow = create_agent()
-        print("✅ Agent workflow created successfully!")
-        
-        # Create a state mimicking a completed validation
-        state = get_default_state()
-        state["generate"]["_internal"]["validation_count"] = 1
-        state["generate"]["_internal"]["validation_complete"] = True
-        state["generate"]["_internal"]["validation_result"] = "Validation completed successfully"
-        
-        # Since we can't easily run the workflow with the updated state,
-        # we'll consider the test successful if the workflow was created
-        print("\n✅ Test passed: The agent workflow was created without errors.")
-        print("If the InvalidUpdateError was present, the workflow creation would have failed.")
-        print("For a full validation, run the agent with actual inputs and verify it reaches validation_count=1.")
+    # Create a state mimicking a completed validation
+    state = get_default_state()
+    state["generate"]["_internal"]["validation_count"] = 1
+    state["generate"]["_internal"]["validation_complete"] = True
+    state["generate"]["_internal"]["validation_result"] = "Validation completed successfully"
     
-    except Exception as e:
-        print(f"❌ Test failed: {str(e)}")
-        raise
-
-if __name__ == "__main__":
-    asyncio.run(test_workflow_with_validation_complete()) 
\ No newline at end of file
+    # Recording the update as validate's output runs validation_router on it
+    await workflow.aupdate_state(config, state, as_node="validate")
+    snapshot = await workflow.aget_state(config)
+    assert snapshot.next == ("generate_code",)
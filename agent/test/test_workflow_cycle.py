@@ -1,70 +1,69 @@
 #!/usr/bin/env python
 """Test script to verify the agent workflow properly terminates after validation."""
 
-import asyncio
-import time
-from aelf_code_generator.agent import create_agent, get_default_state
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from aelf_code_generator.agent import get_default_state
 
-async def test_complete_workflow_cycle():
+# Run every test on the session event loop shared with test_workflows
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+FAILED = {"passed": False, "issues": ["Missing state declaration"], "suggestions": []}
+
+async def test_complete_workflow_cycle(compiled_agent):
     """
-    Test that the agent workflow correctly executes a full cycle and terminates after validation.
-    This test simulates a real input and follows through the entire workflow,
-    verifying the validation_router sends to __end__ after validation.
+    Test that the agent workflow terminates after validation.
+    The real workflow is resumed from a staged state just after validate, so
+    validation_router and the edges after it are exercised without calling the model.
     """
-    print("\n=== Testing complete agent workflow cycle ===\n")
+    # Compile the same graph with a checkpointer so its state can be staged
+    workflow = compiled_agent.builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "workflow-cycle"}}
     
-    try:
-        # Create the agent workflow
-        print("Creating agent workflow...")
-        workflow = create_agent()
-        print("✅ Agent workflow created successfully!")
-        
-        # Create a minimal state with a simple input
-        print("\nPreparing initial state...")
-        state = get_default_state()
-        state["input"] = "Create a simple token contract for AELF"
-        print(f"Input: {state['input']}")
-        
-        print("\nExecuting the workflow...")
-        print("(This will follow the execution through all nodes)")
-        print("-----------------------------------------")
-        
-        # We'll track nodes that are executed to verify flow
-        executed_nodes = []
-        termination_reason = None
-        
-        # Execute the workflow and track the path
-        async for event in workflow.astream_events(state, stream_mode="node", version="v1"):
-            # In v1, the event format is different
-            node_name = event.get("node")
-            status = event.get("status", "unknown")
-            
-            if status == "start":
-                executed_nodes.append(node_name)
-                print(f"Executing node: {node_name}")
-            
-            # Check for completion
-            if node_name == "__end__" and status == "start":
-                termination_reason = "Workflow reached __end__ node"
-                print(f"✅ {termination_reason}")
-                break
-        
-        # Verify the correct path was taken
-        print("\n-----------------------------------------")
-        print("Workflow execution completed!")
-        print(f"Executed nodes: {' -> '.join(executed_nodes)}")
-        
-        # Verify that validation_router was reached and properly terminated
-        if "validation_router" in executed_nodes and executed_nodes[-1] == "__end__":
-            print("✅ PASS: Workflow correctly terminated after validation_router")
-        else:
-            print("❌ FAIL: Workflow did not terminate correctly after validation_router")
-        
-        print("\nTest complete!")
+    # Stage a state mimicking a passed validation
+    state = get_default_state()
+    state["input"] = "Create a simple token contract for AELF"
+    internal_state = state["generate"]["_internal"]
+    internal_state["validation_count"] = 1
+    internal_state["validation_complete"] = True
+    internal_state["validation_status"] = "success"
+    internal_state["validation_result"] = {"passed": True, "issues": [], "suggestions": []}
     
-    except Exception as e:
-        print(f"❌ Test failed with error: {str(e)}")
-        raise
+    # Recording the update as validate's output runs validation_router on it
+    await workflow.aupdate_state(config, state, as_node="validate")
+    snapshot = await workflow.aget_state(config)
+    assert snapshot.next == ("test_contract",), f"Expected test_contract after validation, got {snapshot.next}"
+    
+    # Once test_contract completes nothing is left to run
+    await workflow.aupdate_state(config, {}, as_node="test_contract")
+    snapshot = await workflow.aget_state(config)
+    assert snapshot.next == (), f"Workflow did not reach __end__ after test_contract, next: {snapshot.next}"
 
-if __name__ == "__main__":
-    asyncio.run(test_complete_workflow_cycle()) 
\ No newline at end of file
+@pytest.mark.parametrize(
+    "validation_count,expected",
+    [
+        # A failed validation goes back to generate_code for another attempt
+        (1, ("generate_code",)),
+        # Once the retries are spent the workflow moves on to testing
+        (2, ("test_contract",)),
+    ]
+)
+async def test_failed_validation_cycle(compiled_agent, validation_count, expected):
+    """
+    Test where the workflow goes after a failed validation.
+    The real workflow is resumed from a staged state just after validate.
+    """
+    workflow = compiled_agent.builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": f"failed-validation-{validation_count}"}}
+    
+    # Stage a state mimicking a failed validation
+    state = get_default_state()
+    internal_state = state["generate"]["_internal"]
+    internal_state["validation_count"] = validation_count
+    internal_state["validation_complete"] = True
+    internal_state["validation_status"] = "needs_improvement"
+    internal_state["validation_result"] = FAILED
+    
+    await workflow.aupdate_state(config, state, as_node="validate")
+    snapshot = await workflow.aget_state(config)
+    assert snapshot.next == expected